@@ -2,65 +2,97 @@
 API routes for the GUI backend.
 """
 from fastapi import APIRouter, HTTPException, Body
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, ValidationError
+from typing import List, Dict, Any, Optional, Union, Literal
 
 try:
-    from gui.backend.design_manager import DesignManager
+    from gui.backend.design_manager import (
+        DomainType, COMPONENT_INDEX, CONNECTION_INDEX, index_design, public_design
+    )
+    from gui.backend.deps import design_manager
 except ImportError:
-    from design_manager import DesignManager
+    from design_manager import (
+        DomainType, COMPONENT_INDEX, CONNECTION_INDEX, index_design, public_design
+    )
+    from deps import design_manager
 
-router = APIRouter(prefix="/api")
-design_manager = DesignManager()
+try:
+    from gui.backend.enhanced_factory import EnhancedIacFactory
+except ImportError:
+    # JSON Lines export needs the factory
+    EnhancedIacFactory = None
+
+router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
 
 
 # Request/Response Models
-class CreateDesignRequest(BaseModel):
+class _RequestModel(BaseModel):
+    """Base for request bodies: strict types, no unknown fields."""
+    model_config = ConfigDict(extra="forbid", strict=True)
+
+
+class CreateDesignRequest(_RequestModel):
     name: str
 
 
-class ComponentRequest(BaseModel):
+class ComponentRequest(_RequestModel):
     name: str
     type: str
-    domain_type: str
+    domain_type: DomainType
     technology: str = ""
 
 
-class ConnectionRequest(BaseModel):
+class ConnectionRequest(_RequestModel):
     source: str
     destination: str
     label: str = ""
     technology: str = ""
 
 
-class UpdateComponentRequest(BaseModel):
+class UpdateComponentRequest(_RequestModel):
     name: Optional[str] = None
-    domain_type: Optional[str] = None
+    domain_type: Optional[DomainType] = None
     technology: Optional[str] = None
 
 
-class UpdateConnectionRequest(BaseModel):
+class UpdateConnectionRequest(_RequestModel):
     label: Optional[str] = None
     technology: Optional[str] = None
 
 
+class BatchOp(_RequestModel):
+    """
+    One operation in a batch request.
+    
+    ``target`` is the component name or connection index the operation
+    applies to; ``payload`` is the body the single-operation endpoint takes.
+    """
+    op: Literal[
+        "add_component", "update_component", "delete_component",
+        "add_connection", "update_connection", "delete_connection"
+    ]
+    target: Union[str, int, None] = None
+    payload: Dict[str, Any] = {}
+
+
 # Design Management Endpoints
 @router.post("/designs")
-async def create_design(request: CreateDesignRequest):
+def create_design(request: CreateDesignRequest):
     """Create a new infrastructure design."""
     try:
         design = design_manager.create_design(request.name)
-        return design
+        return ORJSONResponse(design)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/designs/{design_id}")
-async def get_design(design_id: str):
+def get_design(design_id: str):
     """Load an existing design."""
     try:
         design = design_manager.load_design(design_id)
-        return design
+        return ORJSONResponse(public_design(design))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
     except ValueError as e:
@@ -68,10 +100,11 @@ async def get_design(design_id: str):
 
 
 @router.put("/designs/{design_id}")
-async def update_design(design_id: str, design_data: Dict[str, Any] = Body(...)):
+def update_design(design_id: str, design_data: Dict[str, Any] = Body(...)):
     """Update an existing design."""
     try:
-        # Ensure design_id matches
+        # Ensure design_id matches and drop any client-supplied index keys
+        design_data = public_design(design_data)
         design_data["design_id"] = design_id
         
         # Validate
@@ -79,194 +112,296 @@ async def update_design(design_id: str, design_data: Dict[str, Any] = Body(...))
         if errors:
             raise HTTPException(status_code=400, detail={"errors": errors})
         
-        # Save
+        # Save; validation attached the in-memory name indexes, which are not
+        # part of the response
         design_manager.save_design(design_data)
-        return design_data
+        return ORJSONResponse(public_design(design_data))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.delete("/designs/{design_id}")
-async def delete_design(design_id: str):
+def delete_design(design_id: str):
     """Delete a design."""
     try:
         design_manager.delete_design(design_id)
-        return {"message": "Design deleted successfully"}
+        return ORJSONResponse({"message": "Design deleted successfully"})
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
 
 
+@router.get("/designs/{design_id}/export/jsonl")
+def export_jsonl(design_id: str):
+    """Stream a design as JSON Lines."""
+    if EnhancedIacFactory is None:
+        raise HTTPException(status_code=501, detail="JSON Lines export is not available")
+    try:
+        design = design_manager.load_design(design_id)
+        factory = EnhancedIacFactory.from_json(design)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Design cannot be exported: {e}")
+    
+    return StreamingResponse(factory.iter_jsonl(), media_type="application/x-ndjson")
+
+
 @router.get("/designs")
-async def list_designs():
+def list_designs():
     """List all available designs."""
     designs = design_manager.list_designs()
-    return {"designs": designs}
+    return ORJSONResponse({"designs": designs})
+
+
+# Design Mutations
+#
+# Each helper applies one edit to a loaded design in place, keeping the name
+# indexes in sync, and raises HTTPException if the edit is not allowed.
+# Loaded designs share their records with the cache (see working_copy), so
+# edited components, connections and index sets are replaced, not mutated.
+def _add_component(design: Dict[str, Any], component: ComponentRequest) -> None:
+    component_index = design[COMPONENT_INDEX]
+    
+    # Check for duplicate names
+    if component.name in component_index:
+        raise HTTPException(status_code=400, detail=f"Component '{component.name}' already exists")
+    
+    # Add component
+    component_index[component.name] = len(design["components"])
+    design["components"].append({
+        "name": component.name,
+        "type": component.type,
+        "domain_type": component.domain_type,
+        "technology": component.technology
+    })
+
+
+def _update_component(design: Dict[str, Any], component_name: str, updates: UpdateComponentRequest) -> None:
+    component_index = design[COMPONENT_INDEX]
+    
+    # Find component
+    position = component_index.get(component_name)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"Component '{component_name}' not found")
+    component = dict(design["components"][position])
+    design["components"][position] = component
+    
+    # Apply updates
+    if updates.name is not None and updates.name != component_name:
+        # Check for duplicate names
+        if updates.name in component_index:
+            raise HTTPException(status_code=400, detail=f"Component '{updates.name}' already exists")
+        
+        # Update connections that reference this component
+        connection_index = design[CONNECTION_INDEX]
+        referencing = connection_index.pop(component_name, set())
+        for i in referencing:
+            conn = dict(design["connections"][i])
+            design["connections"][i] = conn
+            if conn["source"] == component_name:
+                conn["source"] = updates.name
+            if conn["destination"] == component_name:
+                conn["destination"] = updates.name
+        if referencing:
+            connection_index[updates.name] = referencing
+        
+        del component_index[component_name]
+        component_index[updates.name] = position
+        component["name"] = updates.name
+    
+    if updates.domain_type is not None:
+        component["domain_type"] = updates.domain_type
+    
+    if updates.technology is not None:
+        component["technology"] = updates.technology
+
+
+def _delete_component(design: Dict[str, Any], component_name: str) -> None:
+    # Find and remove component
+    position = design[COMPONENT_INDEX].get(component_name)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"Component '{component_name}' not found")
+    del design["components"][position]
+    
+    # Remove connections involving this component
+    referencing = design[CONNECTION_INDEX].get(component_name)
+    if referencing:
+        design["connections"] = [
+            c for i, c in enumerate(design["connections"]) if i not in referencing
+        ]
+    
+    # Positions after the removed entries have shifted
+    index_design(design)
+
+
+def _add_connection(design: Dict[str, Any], connection: ConnectionRequest) -> None:
+    # Validate source and destination exist
+    component_index = design[COMPONENT_INDEX]
+    
+    if connection.source not in component_index:
+        raise HTTPException(status_code=400, detail=f"Source component '{connection.source}' not found")
+    
+    if connection.destination not in component_index:
+        raise HTTPException(status_code=400, detail=f"Destination component '{connection.destination}' not found")
+    
+    # Add connection
+    position = len(design["connections"])
+    design["connections"].append({
+        "source": connection.source,
+        "destination": connection.destination,
+        "label": connection.label,
+        "technology": connection.technology
+    })
+    connection_index = design[CONNECTION_INDEX]
+    for name in (connection.source, connection.destination):
+        connection_index[name] = connection_index.get(name, set()) | {position}
+
+
+def _update_connection(design: Dict[str, Any], connection_index: int, updates: UpdateConnectionRequest) -> None:
+    if connection_index < 0 or connection_index >= len(design["connections"]):
+        raise HTTPException(status_code=404, detail=f"Connection {connection_index} not found")
+    
+    connection = dict(design["connections"][connection_index])
+    design["connections"][connection_index] = connection
+    
+    if updates.label is not None:
+        connection["label"] = updates.label
+    
+    if updates.technology is not None:
+        connection["technology"] = updates.technology
+
+
+def _delete_connection(design: Dict[str, Any], connection_index: int) -> None:
+    if connection_index < 0 or connection_index >= len(design["connections"]):
+        raise HTTPException(status_code=404, detail=f"Connection {connection_index} not found")
+    
+    design["connections"].pop(connection_index)
+    
+    # Positions after the removed connection have shifted
+    index_design(design)
+
+
+def _apply_batch_op(design: Dict[str, Any], op: BatchOp) -> None:
+    """Validate a batch operation's target and payload, then apply it."""
+    if op.op in ("add_component", "add_connection"):
+        if op.target is not None:
+            raise HTTPException(status_code=400, detail=f"'{op.op}' does not take a target")
+    elif op.op.endswith("_component"):
+        if not isinstance(op.target, str):
+            raise HTTPException(status_code=400, detail=f"'{op.op}' requires a component name target")
+    elif not isinstance(op.target, int):
+        raise HTTPException(status_code=400, detail=f"'{op.op}' requires a connection index target")
+    
+    if op.op == "add_component":
+        _add_component(design, ComponentRequest.model_validate(op.payload))
+    elif op.op == "update_component":
+        _update_component(design, op.target, UpdateComponentRequest.model_validate(op.payload))
+    elif op.op == "delete_component":
+        _delete_component(design, op.target)
+    elif op.op == "add_connection":
+        _add_connection(design, ConnectionRequest.model_validate(op.payload))
+    elif op.op == "update_connection":
+        _update_connection(design, op.target, UpdateConnectionRequest.model_validate(op.payload))
+    else:
+        _delete_connection(design, op.target)
 
 
 # Component Operations
 @router.post("/designs/{design_id}/components")
-async def add_component(design_id: str, component: ComponentRequest):
+def add_component(design_id: str, component: ComponentRequest):
     """Add a component to a design."""
     try:
         design = design_manager.load_design(design_id)
-        
-        # Check for duplicate names
-        if any(c["name"] == component.name for c in design["components"]):
-            raise HTTPException(status_code=400, detail=f"Component '{component.name}' already exists")
-        
-        # Validate domain_type
-        if component.domain_type not in ["Public", "Web", "Application", "Data"]:
-            raise HTTPException(status_code=400, detail=f"Invalid domain_type: {component.domain_type}")
-        
-        # Add component
-        design["components"].append({
-            "name": component.name,
-            "type": component.type,
-            "domain_type": component.domain_type,
-            "technology": component.technology
-        })
-        
+        _add_component(design, component)
         design_manager.save_design(design)
-        return design
+        return ORJSONResponse(public_design(design))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
 
 
 @router.put("/designs/{design_id}/components/{component_name}")
-async def update_component(design_id: str, component_name: str, updates: UpdateComponentRequest):
+def update_component(design_id: str, component_name: str, updates: UpdateComponentRequest):
     """Update a component in a design."""
     try:
         design = design_manager.load_design(design_id)
-        
-        # Find component
-        component = None
-        for c in design["components"]:
-            if c["name"] == component_name:
-                component = c
-                break
-        
-        if not component:
-            raise HTTPException(status_code=404, detail=f"Component '{component_name}' not found")
-        
-        # Apply updates
-        if updates.name is not None:
-            # Check for duplicate names
-            if any(c["name"] == updates.name and c["name"] != component_name for c in design["components"]):
-                raise HTTPException(status_code=400, detail=f"Component '{updates.name}' already exists")
-            
-            # Update connections that reference this component
-            for conn in design["connections"]:
-                if conn["source"] == component_name:
-                    conn["source"] = updates.name
-                if conn["destination"] == component_name:
-                    conn["destination"] = updates.name
-            
-            component["name"] = updates.name
-        
-        if updates.domain_type is not None:
-            if updates.domain_type not in ["Public", "Web", "Application", "Data"]:
-                raise HTTPException(status_code=400, detail=f"Invalid domain_type: {updates.domain_type}")
-            component["domain_type"] = updates.domain_type
-        
-        if updates.technology is not None:
-            component["technology"] = updates.technology
-        
+        _update_component(design, component_name, updates)
         design_manager.save_design(design)
-        return design
+        return ORJSONResponse(public_design(design))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
 
 
 @router.delete("/designs/{design_id}/components/{component_name}")
-async def delete_component(design_id: str, component_name: str):
+def delete_component(design_id: str, component_name: str):
     """Delete a component from a design."""
     try:
         design = design_manager.load_design(design_id)
-        
-        # Find and remove component
-        original_count = len(design["components"])
-        design["components"] = [c for c in design["components"] if c["name"] != component_name]
-        
-        if len(design["components"]) == original_count:
-            raise HTTPException(status_code=404, detail=f"Component '{component_name}' not found")
-        
-        # Remove connections involving this component
-        design["connections"] = [
-            c for c in design["connections"]
-            if c["source"] != component_name and c["destination"] != component_name
-        ]
-        
+        _delete_component(design, component_name)
         design_manager.save_design(design)
-        return design
+        return ORJSONResponse(public_design(design))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
 
 
 # Connection Operations
 @router.post("/designs/{design_id}/connections")
-async def add_connection(design_id: str, connection: ConnectionRequest):
+def add_connection(design_id: str, connection: ConnectionRequest):
     """Add a connection to a design."""
     try:
         design = design_manager.load_design(design_id)
-        
-        # Validate source and destination exist
-        component_names = {c["name"] for c in design["components"]}
-        
-        if connection.source not in component_names:
-            raise HTTPException(status_code=400, detail=f"Source component '{connection.source}' not found")
-        
-        if connection.destination not in component_names:
-            raise HTTPException(status_code=400, detail=f"Destination component '{connection.destination}' not found")
-        
-        # Add connection
-        design["connections"].append({
-            "source": connection.source,
-            "destination": connection.destination,
-            "label": connection.label,
-            "technology": connection.technology
-        })
-        
+        _add_connection(design, connection)
         design_manager.save_design(design)
-        return design
+        return ORJSONResponse(public_design(design))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
 
 
 @router.put("/designs/{design_id}/connections/{connection_index}")
-async def update_connection(design_id: str, connection_index: int, updates: UpdateConnectionRequest):
+def update_connection(design_id: str, connection_index: int, updates: UpdateConnectionRequest):
     """Update a connection in a design."""
     try:
         design = design_manager.load_design(design_id)
-        
-        if connection_index < 0 or connection_index >= len(design["connections"]):
-            raise HTTPException(status_code=404, detail=f"Connection {connection_index} not found")
-        
-        connection = design["connections"][connection_index]
-        
-        if updates.label is not None:
-            connection["label"] = updates.label
-        
-        if updates.technology is not None:
-            connection["technology"] = updates.technology
-        
+        _update_connection(design, connection_index, updates)
         design_manager.save_design(design)
-        return design
+        return ORJSONResponse(public_design(design))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
 
 
 @router.delete("/designs/{design_id}/connections/{connection_index}")
-async def delete_connection(design_id: str, connection_index: int):
+def delete_connection(design_id: str, connection_index: int):
     """Delete a connection from a design."""
+    try:
+        design = design_manager.load_design(design_id)
+        _delete_connection(design, connection_index)
+        design_manager.save_design(design)
+        return ORJSONResponse(public_design(design))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
+
+
+# Batch Operations
+@router.post("/designs/{design_id}/batch")
+def apply_batch(design_id: str, ops: List[BatchOp]):
+    """
+    Apply several component/connection operations with a single load and save.
+    
+    Operations run in order against the same design. The batch is
+    all-or-nothing: if any operation fails nothing is saved and the error
+    detail reports the index of the failing operation.
+    """
     try:
         design = design_manager.load_design(design_id)
         
-        if connection_index < 0 or connection_index >= len(design["connections"]):
-            raise HTTPException(status_code=404, detail=f"Connection {connection_index} not found")
-        
-        design["connections"].pop(connection_index)
+        for i, op in enumerate(ops):
+            try:
+                _apply_batch_op(design, op)
+            except HTTPException as e:
+                raise HTTPException(status_code=e.status_code, detail={"op": i, "error": e.detail})
+            except ValidationError as e:
+                raise HTTPException(status_code=422, detail={"op": i, "error": e.errors(include_url=False)})
         
         design_manager.save_design(design)
-        return design
+        return ORJSONResponse(public_design(design))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
@@ -1,142 +1,240 @@
 """
 Code generation endpoints.
 """
-from fastapi import APIRouter, HTTPException
-import sys
-import os
-from pathlib import Path
+from fastapi import APIRouter, HTTPException, Header, Query, Response
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from typing import Any, Dict, Optional, Tuple, Literal
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+import threading
 
-# Add project root to path
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+import orjson
+
+from iac_factory.factory import IacFactory
+from iac_factory.components import Gateway, Container, Lambda, Cache, Rdms, Archive
+
+try:
+    from gui.backend.design_manager import CACHE_SIZE, public_design
+    from gui.backend.deps import design_manager
+except ImportError:
+    from design_manager import CACHE_SIZE, public_design
+    from deps import design_manager
 
 try:
-    from gui.backend.design_manager import DesignManager
+    from gui.backend.enhanced_factory import EnhancedIacFactory
 except ImportError:
-    from design_manager import DesignManager
+    # Fall back to building a plain IacFactory
+    EnhancedIacFactory = None
+
+router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
+
+# Component type mapping
+_COMPONENT_CLASSES = {
+    "Gateway": Gateway,
+    "Container": Container,
+    "Lambda": Lambda,
+    "Cache": Cache,
+    "Rdms": Rdms,
+    "Archive": Archive
+}
+
+# Generator method, response format and raw media type for each target
+GENERATION_TARGETS = {
+    "mermaid": ("generate_mermaid_diagram", "mermaid", "text/plain"),
+    "pulumi": ("generate_pulumi_code", "python", "text/x-python"),
+    "cdk": ("generate_cdk_code", "python", "text/x-python"),
+}
+
+# LRU cache of generated code keyed by (design_id, target), validated by
+# design digest. Entries hold the code and its encoded JSON response body.
+_gen_cache: Dict[Tuple[str, str], Tuple[str, str, bytes]] = OrderedDict()
+_gen_lock = threading.Lock()
+
+# Worker processes for CPU-bound generation; None runs generators inline
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+def start_generation_pool(max_workers: Optional[int] = None) -> None:
+    """
+    Start the process pool used for code generation.
+    
+    Args:
+        max_workers: Number of worker processes (defaults to the CPU count)
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=max_workers)
+            _executor_workers = max_workers
+
+
+def stop_generation_pool() -> None:
+    """Shut down the code generation process pool."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
 
-router = APIRouter(prefix="/api")
-design_manager = DesignManager()
+def _replace_broken_pool(broken: ProcessPoolExecutor) -> Optional[ProcessPoolExecutor]:
+    """Swap a pool whose worker died for a fresh one and return the current pool."""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            broken.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=_executor_workers)
+        return _executor
 
 
 def design_to_factory(design_data):
     """Convert design data to IacFactory instance."""
-    # Import iac-factory components
-    try:
-        # Try package imports first
-        from iac_factory.factory import IacFactory
-        from iac_factory.components import Gateway, Container, Lambda, Cache, Rdms, Archive
-    except ImportError:
-        # Fallback for when running as module
-        import iac_factory.factory as factory_module
-        import iac_factory.components as components_module
-        IacFactory = factory_module.IacFactory
-        Gateway = components_module.Gateway
-        Container = components_module.Container
-        Lambda = components_module.Lambda
-        Cache = components_module.Cache
-        Rdms = components_module.Rdms
-        Archive = components_module.Archive
-    
     # Try to use enhanced factory if available
+    if EnhancedIacFactory is not None:
+        try:
+            return EnhancedIacFactory.from_json(design_data)
+        except Exception:
+            pass
+    
+    # Fallback: create factory manually
+    factory = IacFactory(design_data["name"])
+    
+    # Add components, skipping unknown types
+    components = [
+        _COMPONENT_CLASSES[comp_data["type"]](
+            name=comp_data["name"],
+            domain_type=comp_data["domain_type"],
+            technology=comp_data.get("technology", "")
+        )
+        for comp_data in design_data.get("components", [])
+        if comp_data["type"] in _COMPONENT_CLASSES
+    ]
+    for component in components:
+        factory.add_component(component)
+    component_map = {component.name: component for component in components}
+    
+    # Add connections
+    for conn_data in design_data.get("connections", []):
+        source = component_map.get(conn_data["source"])
+        destination = component_map.get(conn_data["destination"])
+        if source and destination:
+            factory.add_connection(
+                source=source,
+                destination=destination,
+                label=conn_data.get("label", ""),
+                technology=conn_data.get("technology", "")
+            )
+    
+    return factory
+
+
+def _run_generator(design_data: Dict[str, Any], method_name: str) -> str:
+    """Build a factory from design data and run one of its generators."""
+    return getattr(design_to_factory(design_data), method_name)()
+
+
+def _generate(design_data: Dict[str, Any], method_name: str) -> str:
+    """
+    Run a generator in the process pool, or inline when there is none.
+    
+    If a worker process has died the pool is broken for good, so it is
+    replaced and the generation retried once.
+    """
+    executor = _executor
+    if executor is None:
+        return _run_generator(design_data, method_name)
+    
+    payload = public_design(design_data)
     try:
-        from gui.backend.enhanced_factory import EnhancedIacFactory
-        return EnhancedIacFactory.from_json(design_data)
-    except (ImportError, Exception):
-        # Fallback: create factory manually
-        
-        factory = IacFactory(design_data["name"])
-        
-        # Component type mapping
-        component_classes = {
-            "Gateway": Gateway,
-            "Container": Container,
-            "Lambda": Lambda,
-            "Cache": Cache,
-            "Rdms": Rdms,
-            "Archive": Archive
-        }
-        
-        # Add components
-        component_map = {}
-        for comp_data in design_data.get("components", []):
-            comp_class = component_classes.get(comp_data["type"])
-            if comp_class:
-                component = comp_class(
-                    name=comp_data["name"],
-                    domain_type=comp_data["domain_type"],
-                    technology=comp_data.get("technology", "")
-                )
-                factory.add_component(component)
-                component_map[comp_data["name"]] = component
-        
-        # Add connections
-        for conn_data in design_data.get("connections", []):
-            source = component_map.get(conn_data["source"])
-            destination = component_map.get(conn_data["destination"])
-            if source and destination:
-                factory.add_connection(
-                    source=source,
-                    destination=destination,
-                    label=conn_data.get("label", ""),
-                    technology=conn_data.get("technology", "")
-                )
+        return executor.submit(_run_generator, payload, method_name).result()
+    except BrokenProcessPool:
+        executor = _replace_broken_pool(executor)
+        if executor is None:
+            return _run_generator(payload, method_name)
+        return executor.submit(_run_generator, payload, method_name).result()
+
+
+def design_digest(design_data: Dict[str, Any]) -> str:
+    """
+    Hash the parts of a design that affect generated code.
+    
+    Args:
+        design_data: Design data dictionary
         
-        return factory
+    Returns:
+        Hex digest
+    """
+    content = orjson.dumps(
+        [design_data["name"], design_data["components"], design_data["connections"]],
+        option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
 
 
-@router.post("/designs/{design_id}/generate/mermaid")
-async def generate_mermaid(design_id: str):
-    """Generate Mermaid diagram from design."""
+def _generate_code(design_id: str, target: str, response_format: str,
+                   if_none_match: Optional[str]) -> Response:
+    """Generate code for a design, reusing the cached result while the design is unchanged."""
+    method_name, code_format, media_type = GENERATION_TARGETS[target]
     try:
         design = design_manager.load_design(design_id)
-        factory = design_to_factory(design)
+        digest = design_digest(design)
+        etag = f'"{digest}-raw"' if response_format == "raw" else f'"{digest}"'
+        
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
         
-        mermaid_code = factory.generate_mermaid_diagram()
+        key = (design_id, target)
+        cached = None
+        with _gen_lock:
+            entry = _gen_cache.get(key)
+            if entry is not None and entry[0] == digest:
+                _gen_cache.move_to_end(key)
+                cached = entry
         
-        return {
-            "code": mermaid_code,
-            "format": "mermaid"
-        }
+        if cached is None:
+            code = _generate(design, method_name)
+            body = orjson.dumps({"code": code, "format": code_format})
+            cached = (digest, code, body)
+            with _gen_lock:
+                _gen_cache[key] = cached
+                _gen_cache.move_to_end(key)
+                if len(_gen_cache) > CACHE_SIZE:
+                    _gen_cache.popitem(last=False)
+        
+        if response_format == "raw":
+            return PlainTextResponse(cached[1], media_type=media_type, headers={"ETag": etag})
+        return Response(cached[2], media_type="application/json", headers={"ETag": etag})
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
 
 
+# Generation endpoints return {"code", "format"} JSON, or the bare code as
+# text with ?format=raw.
+@router.post("/designs/{design_id}/generate/mermaid")
+def generate_mermaid(design_id: str,
+                     response_format: Literal["json", "raw"] = Query("json", alias="format"),
+                     if_none_match: Optional[str] = Header(None)):
+    """Generate Mermaid diagram from design."""
+    return _generate_code(design_id, "mermaid", response_format, if_none_match)
+
+
 @router.post("/designs/{design_id}/generate/pulumi")
-async def generate_pulumi(design_id: str):
+def generate_pulumi(design_id: str,
+                    response_format: Literal["json", "raw"] = Query("json", alias="format"),
+                    if_none_match: Optional[str] = Header(None)):
     """Generate Pulumi code from design."""
-    try:
-        design = design_manager.load_design(design_id)
-        factory = design_to_factory(design)
-        
-        pulumi_code = factory.generate_pulumi_code()
-        
-        return {
-            "code": pulumi_code,
-            "format": "python"
-        }
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+    return _generate_code(design_id, "pulumi", response_format, if_none_match)
 
 
 @router.post("/designs/{design_id}/generate/cdk")
-async def generate_cdk(design_id: str):
+def generate_cdk(design_id: str,
+                 response_format: Literal["json", "raw"] = Query("json", alias="format"),
+                 if_none_match: Optional[str] = Header(None)):
     """Generate AWS CDK code from design."""
-    try:
-        design = design_manager.load_design(design_id)
-        factory = design_to_factory(design)
-        
-        cdk_code = factory.generate_cdk_code()
-        
-        return {
-            "code": cdk_code,
-            "format": "python"
-        }
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail=f"Design {design_id} not found")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+    return _generate_code(design_id, "cdk", response_format, if_none_match)
@@ -0,0 +1,10 @@
+"""
+Shared dependencies for the API routers.
+"""
+try:
+    from gui.backend.design_manager import DesignManager
+except ImportError:
+    from design_manager import DesignManager
+
+# Single manager for all routers so they share one cache and write-behind queue
+design_manager = DesignManager()
@@ -2,12 +2,173 @@
 DesignManager for persisting and managing infrastructure designs.
 """
 import os
-import json
 import uuid
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import atexit
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from typing import List, Dict, Any, Optional, Tuple, Literal
+from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
+from pydantic import TypeAdapter, ValidationError
+# pydantic only accepts typing.TypedDict on Python 3.12+, so the schema uses
+# the typing_extensions backport
+from typing_extensions import TypedDict
+
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of parsed designs kept in memory
+CACHE_SIZE = 256
+
+# Seconds to coalesce saves before writing pending designs to disk
+FLUSH_DELAY = 0.2
+
+# Sidecar file in the storage directory holding design summaries; not a
+# .json name, so it can never collide with a design stored as {id}.json
+INDEX_FILE = "designs.index"
+
+# Valid component domains
+DomainType = Literal["Public", "Web", "Application", "Data"]
+
+
+# Design schema checked by validate_design; compiled once by pydantic-core
+class _ComponentSchema(TypedDict):
+    name: str
+    type: str
+    domain_type: DomainType
+
+
+class _ConnectionSchema(TypedDict):
+    source: str
+    destination: str
+
+
+class _DesignSchema(TypedDict):
+    design_id: str
+    name: str
+    components: List[_ComponentSchema]
+    connections: List[_ConnectionSchema]
+
+
+_DESIGN_VALIDATOR = TypeAdapter(_DesignSchema)
+
+
+def _format_schema_error(error: Dict[str, Any]) -> str:
+    """Render a pydantic error in validate_design's message style."""
+    loc = error["loc"]
+    if len(loc) == 1:
+        if error["type"] == "missing":
+            return f"Missing required field: {loc[0]}"
+        if error["type"] == "list_type":
+            return f"'{loc[0]}' must be a list"
+    elif loc[0] in ("components", "connections"):
+        label = "Component" if loc[0] == "components" else "Connection"
+        if len(loc) == 2:
+            return f"{label} {loc[1]} must be a dictionary"
+        if error["type"] == "missing":
+            return f"{label} {loc[1]} missing '{loc[2]}' field"
+        if loc[2] == "domain_type":
+            return f"{label} {loc[1]} has invalid domain_type: {error['input']}"
+    return f"{'.'.join(str(part) for part in loc)}: {error['msg']}"
+
+
+# In-memory index keys attached to loaded designs (never persisted)
+COMPONENT_INDEX = "_component_index"
+CONNECTION_INDEX = "_connection_index"
+
+
+def index_design(design_data: Dict[str, Any]) -> None:
+    """
+    Attach name indexes to a design in place.
+    
+    ``_component_index`` maps component name to its position in
+    ``components``; ``_connection_index`` maps component name to the set of
+    positions in ``connections`` that reference it as source or destination.
+    
+    Args:
+        design_data: Design data dictionary
+    """
+    design_data[COMPONENT_INDEX] = {
+        comp["name"]: i for i, comp in enumerate(design_data["components"])
+    }
+    connection_index = defaultdict(set)
+    for i, conn in enumerate(design_data["connections"]):
+        connection_index[conn["source"]].add(i)
+        connection_index[conn["destination"]].add(i)
+    design_data[CONNECTION_INDEX] = connection_index
+
+
+def _duplicate_names(components: List[Dict[str, Any]]) -> List[str]:
+    """Return component names that occur more than once, in first-seen order."""
+    seen = set()
+    duplicates = []
+    for comp in components:
+        name = comp["name"]
+        if name in seen and name not in duplicates:
+            duplicates.append(name)
+        seen.add(name)
+    return duplicates
+
+
+def summarize_design(design_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the summary shown in design listings.
+    
+    Args:
+        design_data: Design data dictionary
+        
+    Returns:
+        Design summary
+    """
+    return {
+        "design_id": design_data.get("design_id"),
+        "name": design_data.get("name"),
+        "component_count": len(design_data.get("components", [])),
+        "connection_count": len(design_data.get("connections", [])),
+        "created_at": design_data.get("created_at"),
+        "updated_at": design_data.get("updated_at")
+    }
+
+
+def working_copy(design_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy a design for mutation without copying its records.
+    
+    The top-level dict, the ``components``/``connections`` lists and the name
+    indexes are new containers; the component and connection dicts and the
+    connection index sets are shared with the source. Code that edits a
+    working copy must replace a record or set rather than mutate it in place.
+    
+    Args:
+        design_data: Design data dictionary
+        
+    Returns:
+        Working copy of the design
+    """
+    design_copy = dict(design_data)
+    design_copy["components"] = list(design_data["components"])
+    design_copy["connections"] = list(design_data["connections"])
+    if COMPONENT_INDEX in design_data:
+        design_copy[COMPONENT_INDEX] = dict(design_data[COMPONENT_INDEX])
+        design_copy[CONNECTION_INDEX] = dict(design_data[CONNECTION_INDEX])
+    return design_copy
+
+
+def public_design(design_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Strip in-memory index keys from a design.
+    
+    Args:
+        design_data: Design data dictionary
+        
+    Returns:
+        Design data without underscore-prefixed keys
+    """
+    return {k: v for k, v in design_data.items() if not k.startswith("_")}
+
 
 class DesignManager:
     """Manages design persistence and retrieval."""
@@ -21,11 +182,186 @@ class DesignManager:
         """
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True)
+        
+        # LRU cache of parsed designs keyed by design_id, validated by file mtime.
+        # Routes run in Starlette's threadpool, so access is serialized by a lock.
+        self._cache: Dict[str, Tuple[int, Dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Write-behind queue: saved designs not yet flushed to disk
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flush_lock = threading.Lock()
+        atexit.register(self.flush)
+        
+        # Design summaries keyed by design_id, mirrored to INDEX_FILE on flush.
+        # Loaded lazily; None until first needed.
+        self._index_path = self.storage_dir / INDEX_FILE
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._index_dirty = False
     
     def _get_design_path(self, design_id: str) -> Path:
         """Get the file path for a design."""
         return self.storage_dir / f"{design_id}.json"
     
+    def _cache_put(self, design_id: str, mtime_ns: int, design_data: Dict[str, Any]) -> None:
+        """Store a parsed design in the cache, evicting the least recently used entry."""
+        with self._lock:
+            self._cache[design_id] = (mtime_ns, design_data)
+            self._cache.move_to_end(design_id)
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+    
+    def _cache_get(self, design_id: str, mtime_ns: int) -> Optional[Dict[str, Any]]:
+        """Return the cached design if it is still current, else None."""
+        with self._lock:
+            cached = self._cache.get(design_id)
+            if cached is None or cached[0] != mtime_ns:
+                return None
+            self._cache.move_to_end(design_id)
+            return cached[1]
+    
+    def _cache_evict(self, design_id: str) -> None:
+        """Drop a design from the cache."""
+        with self._lock:
+            self._cache.pop(design_id, None)
+    
+    def _atomic_write(self, path: Path, data: bytes) -> None:
+        """
+        Atomically replace a file in the storage directory.
+        
+        The content goes to a temporary file next to the target which then
+        replaces it, so readers never see a partial write.
+        """
+        tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+        
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+    
+    def _write_design(self, design_id: str, design_data: Dict[str, Any]) -> int:
+        """Write a design file and return its new mtime."""
+        design_path = self._get_design_path(design_id)
+        self._atomic_write(design_path, orjson.dumps(
+            public_design(design_data),
+            option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+        ))
+        return design_path.stat().st_mtime_ns
+    
+    def _ensure_index(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the summary index, loading it on first use.
+        
+        Reads INDEX_FILE and reconciles it with a listing of the storage
+        directory: entries whose file is gone are dropped and only files the
+        sidecar does not know about are parsed. This covers a crash between
+        writing a design and writing the index, and files added or removed
+        outside the app. Must be called with ``self._lock`` held.
+        """
+        if self._index is not None:
+            return self._index
+        
+        try:
+            with open(self._index_path, 'rb') as f:
+                index = orjson.loads(f.read())
+            changed = not isinstance(index, dict)
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            index = None
+            changed = True
+        if changed:
+            index = {}
+        
+        with os.scandir(self.storage_dir) as entries:
+            on_disk = {
+                entry.name[:-len(".json")]: entry.path
+                for entry in entries
+                if entry.name.endswith(".json")
+            }
+        
+        for design_id in [d for d in index if d not in on_disk]:
+            del index[design_id]
+            changed = True
+        
+        for design_id, path in on_disk.items():
+            if design_id in index:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    design_data = orjson.loads(f.read())
+            except (OSError, orjson.JSONDecodeError):
+                # Skip unreadable files
+                continue
+            if not isinstance(design_data, dict) or "design_id" not in design_data:
+                # Skip files that are not designs
+                continue
+            index[design_id] = summarize_design(design_data)
+            changed = True
+        
+        self._index = index
+        self._index_dirty = changed
+        return index
+    
+    def _schedule_flush(self) -> None:
+        """Start the flush timer if none is pending. Must be called with ``self._lock`` held."""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(FLUSH_DELAY, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self) -> None:
+        """
+        Write all pending designs and the summary index to disk.
+        
+        A write that fails is logged and stays queued; the remaining writes
+        still run and another flush is scheduled to retry the failures.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                pending = list(self._dirty.items())
+            
+            failed = False
+            for design_id, design_data in pending:
+                try:
+                    mtime_ns = self._write_design(design_id, design_data)
+                except OSError:
+                    logger.exception("Failed to write design %s; will retry", design_id)
+                    failed = True
+                    continue
+                with self._lock:
+                    # Keep the entry queued if it was saved again meanwhile
+                    if self._dirty.get(design_id) is design_data:
+                        del self._dirty[design_id]
+                self._cache_put(design_id, mtime_ns, design_data)
+            
+            with self._lock:
+                index = dict(self._index) if self._index_dirty else None
+                self._index_dirty = False
+            if index is not None:
+                try:
+                    self._atomic_write(self._index_path, orjson.dumps(index))
+                except OSError:
+                    logger.exception("Failed to write design index; will retry")
+                    failed = True
+                    with self._lock:
+                        self._index_dirty = True
+            
+            if failed:
+                with self._lock:
+                    self._schedule_flush()
+    
     def create_design(self, name: str) -> Dict[str, Any]:
         """
         Create a new infrastructure design.
@@ -37,18 +373,19 @@ class DesignManager:
             Design data dictionary
         """
         design_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc).isoformat()
         design_data = {
             "design_id": design_id,
             "name": name,
             "components": [],
             "connections": [],
             "component_states": {},
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
+            "created_at": now,
+            "updated_at": now
         }
         
         # Save to file
-        self.save_design(design_data)
+        self.save_design(design_data, now=now)
         
         return design_data
     
@@ -60,20 +397,35 @@ class DesignManager:
             design_id: ID of the design to load
             
         Returns:
-            Design data dictionary
+            Working copy of the design with name indexes attached (see
+            index_design and working_copy)
             
         Raises:
             FileNotFoundError: If design doesn't exist
             ValueError: If design file is invalid
         """
+        # Saved but not yet flushed
+        with self._lock:
+            pending = self._dirty.get(design_id)
+        if pending is not None:
+            return working_copy(pending)
+        
         design_path = self._get_design_path(design_id)
         
-        if not design_path.exists():
+        try:
+            mtime_ns = design_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._cache_evict(design_id)
             raise FileNotFoundError(f"Design {design_id} not found")
         
+        # Serve from cache while the file is unchanged on disk
+        cached = self._cache_get(design_id, mtime_ns)
+        if cached is not None:
+            return working_copy(cached)
+        
         try:
-            with open(design_path, 'r') as f:
-                design_data = json.load(f)
+            with open(design_path, 'rb') as f:
+                design_data = orjson.loads(f.read())
             
             # Validate required fields
             required_fields = ["design_id", "name", "components", "connections"]
@@ -81,29 +433,46 @@ class DesignManager:
                 if field not in design_data:
                     raise ValueError(f"Invalid design file: missing '{field}' field")
             
-            return design_data
+            # The name indexes assume unique names
+            index_design(design_data)
+            if len(design_data[COMPONENT_INDEX]) != len(design_data["components"]):
+                names = ", ".join(_duplicate_names(design_data["components"]))
+                raise ValueError(f"Invalid design file: duplicate component name: {names}")
+            
+            self._cache_put(design_id, mtime_ns, design_data)
+            return working_copy(design_data)
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in design file: {e}")
     
-    def save_design(self, design_data: Dict[str, Any]) -> None:
+    def save_design(self, design_data: Dict[str, Any], now: Optional[str] = None) -> None:
         """
         Persist design to storage.
         
+        Saves are queued and written to disk after FLUSH_DELAY seconds, so a
+        burst of edits to the same design results in a single write.
+        
         Args:
             design_data: Design data dictionary
+            now: Timestamp to record as updated_at (defaults to the current time)
         """
         design_id = design_data.get("design_id")
         if not design_id:
             raise ValueError("Design data must include 'design_id'")
         
         # Update timestamp
-        design_data["updated_at"] = datetime.utcnow().isoformat()
+        design_data["updated_at"] = now or datetime.now(timezone.utc).isoformat()
         
-        design_path = self._get_design_path(design_id)
+        # Callers may keep editing their dict, so queue a private working copy
+        pending = working_copy(design_data)
+        if COMPONENT_INDEX not in pending:
+            index_design(pending)
         
-        with open(design_path, 'w') as f:
-            json.dump(design_data, f, indent=2)
+        with self._lock:
+            self._dirty[design_id] = pending
+            self._ensure_index()[design_id] = summarize_design(pending)
+            self._index_dirty = True
+            self._schedule_flush()
     
     def delete_design(self, design_id: str) -> None:
         """
@@ -117,39 +486,35 @@ class DesignManager:
         """
         design_path = self._get_design_path(design_id)
         
-        if not design_path.exists():
-            raise FileNotFoundError(f"Design {design_id} not found")
+        with self._flush_lock:
+            with self._lock:
+                pending = self._dirty.pop(design_id, None)
+            
+            if not design_path.exists():
+                if pending is None:
+                    raise FileNotFoundError(f"Design {design_id} not found")
+            else:
+                design_path.unlink()
+            
+            with self._lock:
+                self._ensure_index().pop(design_id, None)
+                self._index_dirty = True
+                self._schedule_flush()
         
-        design_path.unlink()
+        self._cache_evict(design_id)
     
     def list_designs(self) -> List[Dict[str, Any]]:
         """
         List all available designs.
         
+        Summaries come from the in-memory index kept in step with saves and
+        deletes, so no design files are opened.
+        
         Returns:
             List of design summaries
         """
-        designs = []
-        
-        for design_file in self.storage_dir.glob("*.json"):
-            try:
-                with open(design_file, 'r') as f:
-                    design_data = json.load(f)
-                
-                # Create summary
-                summary = {
-                    "design_id": design_data.get("design_id"),
-                    "name": design_data.get("name"),
-                    "component_count": len(design_data.get("components", [])),
-                    "connection_count": len(design_data.get("connections", [])),
-                    "created_at": design_data.get("created_at"),
-                    "updated_at": design_data.get("updated_at")
-                }
-                designs.append(summary)
-                
-            except (json.JSONDecodeError, KeyError):
-                # Skip invalid files
-                continue
+        with self._lock:
+            designs = list(self._ensure_index().values())
         
         # Sort by updated_at descending
         designs.sort(key=lambda d: d.get("updated_at", ""), reverse=True)
@@ -160,61 +525,44 @@ class DesignManager:
         """
         Validate design data structure.
         
+        A design with a valid shape gets its name indexes attached (see
+        index_design), so the duplicate and reference checks and a following
+        save_design reuse them instead of rebuilding the component name set.
+        
         Args:
             design_data: Design data to validate
             
         Returns:
             List of validation error messages (empty if valid)
         """
-        errors = []
+        try:
+            _DESIGN_VALIDATOR.validate_python(design_data)
+            errors = []
+        except ValidationError as e:
+            errors = [_format_schema_error(error) for error in e.errors(include_url=False)]
         
-        # Check required fields
-        required_fields = ["design_id", "name", "components", "connections"]
-        for field in required_fields:
-            if field not in design_data:
-                errors.append(f"Missing required field: {field}")
+        # Check that connections reference existing components
+        components = design_data.get("components")
+        connections = design_data.get("connections")
+        if not errors:
+            if COMPONENT_INDEX not in design_data:
+                index_design(design_data)
+            component_names = design_data[COMPONENT_INDEX]
+            if len(component_names) != len(components):
+                errors = [f"Duplicate component name: {name}" for name in _duplicate_names(components)]
+            elif design_data[CONNECTION_INDEX].keys() <= component_names.keys():
+                return errors
+        elif isinstance(components, list) and isinstance(connections, list):
+            component_names = {c.get("name") for c in components if isinstance(c, dict)}
+        else:
+            return errors
         
-        # Validate components
-        if "components" in design_data:
-            if not isinstance(design_data["components"], list):
-                errors.append("'components' must be a list")
-            else:
-                for i, comp in enumerate(design_data["components"]):
-                    if not isinstance(comp, dict):
-                        errors.append(f"Component {i} must be a dictionary")
-                        continue
-                    
-                    if "name" not in comp:
-                        errors.append(f"Component {i} missing 'name' field")
-                    if "type" not in comp:
-                        errors.append(f"Component {i} missing 'type' field")
-                    if "domain_type" not in comp:
-                        errors.append(f"Component {i} missing 'domain_type' field")
-                    
-                    # Validate domain_type
-                    if comp.get("domain_type") not in ["Public", "Web", "Application", "Data"]:
-                        errors.append(f"Component {i} has invalid domain_type: {comp.get('domain_type')}")
-        
-        # Validate connections
-        if "connections" in design_data:
-            if not isinstance(design_data["connections"], list):
-                errors.append("'connections' must be a list")
-            else:
-                component_names = {c.get("name") for c in design_data.get("components", [])}
-                
-                for i, conn in enumerate(design_data["connections"]):
-                    if not isinstance(conn, dict):
-                        errors.append(f"Connection {i} must be a dictionary")
-                        continue
-                    
-                    if "source" not in conn:
-                        errors.append(f"Connection {i} missing 'source' field")
-                    elif conn["source"] not in component_names:
-                        errors.append(f"Connection {i} references non-existent source: {conn['source']}")
-                    
-                    if "destination" not in conn:
-                        errors.append(f"Connection {i} missing 'destination' field")
-                    elif conn["destination"] not in component_names:
-                        errors.append(f"Connection {i} references non-existent destination: {conn['destination']}")
+        for i, conn in enumerate(connections):
+            if not isinstance(conn, dict):
+                continue
+            if "source" in conn and conn["source"] not in component_names:
+                errors.append(f"Connection {i} references non-existent source: {conn['source']}")
+            if "destination" in conn and conn["destination"] not in component_names:
+                errors.append(f"Connection {i} references non-existent destination: {conn['destination']}")
         
         return errors
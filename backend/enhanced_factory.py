@@ -1,27 +1,99 @@
 """
 Enhanced IacFactory with state management for GUI.
 """
-import json
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
-from typing import Dict, Any, Optional, List
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, IO, Iterator, TypedDict
 from dataclasses import dataclass
-import sys
-import os
-from pathlib import Path
-
-# Add project root to path
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
 
 # Import from iac-factory package
 from iac_factory.factory import IacFactory
 from iac_factory.components import Gateway, Container, Lambda, Cache, Rdms, Archive
 from iac_factory.connection import Connection
 
+# JSON codec: orjson when available, then ujson, then stdlib json
+try:
+    import orjson
+    
+    def _dumps(data: Any) -> str:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    
+    def _dumps_line(data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+    
+    _loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        
+        def _dumps(data: Any) -> str:
+            return ujson.dumps(data, indent=2, escape_forward_slashes=False)
+        
+        def _dumps_line(data: Any) -> bytes:
+            return (ujson.dumps(data, escape_forward_slashes=False) + "\n").encode()
+        
+        _loads = ujson.loads
+    except ImportError:
+        import json
+        
+        def _dumps(data: Any) -> str:
+            return json.dumps(data, indent=2)
+        
+        def _dumps_line(data: Any) -> bytes:
+            return (json.dumps(data) + "\n").encode()
+        
+        _loads = json.loads
+
+# Component type mapping for deserialization
+_COMPONENT_CLASSES = MappingProxyType({
+    "Gateway": Gateway,
+    "Container": Container,
+    "Lambda": Lambda,
+    "Cache": Cache,
+    "Rdms": Rdms,
+    "Archive": Archive
+})
+
+
+class ComponentRecord(TypedDict):
+    """Serialized component, as written by to_json and iter_jsonl."""
+    name: str
+    type: str
+    domain_type: str
+    technology: str
+
+
+class ConnectionRecord(TypedDict):
+    """Serialized connection, as written by to_json and iter_jsonl."""
+    source: str
+    destination: str
+    label: str
+    technology: str
+
 
-class ComponentState(Enum):
+def _component_record(comp: Any) -> ComponentRecord:
+    """Serialize a component."""
+    return {
+        "name": comp.name,
+        "type": type(comp).__name__,
+        "domain_type": comp.domain_type,
+        "technology": comp.get_technology()
+    }
+
+
+def _connection_record(conn: Connection) -> ConnectionRecord:
+    """Serialize a connection."""
+    return {
+        "source": conn.source.name,
+        "destination": conn.destination.name,
+        "label": conn.label,
+        "technology": conn.technology
+    }
+
+
+class ComponentState(str, Enum):
     """Deployment state of a component."""
     UNDEPLOYED = "undeployed"
     DEPLOYING = "deploying"
@@ -31,7 +103,7 @@ class ComponentState(Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class ComponentStateInfo:
     """Detailed state information for a component."""
     state: ComponentState
@@ -39,44 +111,150 @@ class ComponentStateInfo:
     error_message: Optional[str] = None
     last_updated: Optional[str] = None
     
+    def __post_init__(self) -> None:
+        """Stamp the state at creation so serialization needs no clock read."""
+        if self.last_updated is None:
+            self.last_updated = datetime.now(timezone.utc).isoformat()
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
         return {
-            "state": self.state.value,
+            "state": self.state,
             "resource_id": self.resource_id,
             "error_message": self.error_message,
-            "last_updated": self.last_updated or datetime.utcnow().isoformat()
+            "last_updated": self.last_updated
         }
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'ComponentStateInfo':
-        """Create from dictionary."""
+    def from_dict(cls, data: Dict[str, Any], now: Optional[str] = None) -> 'ComponentStateInfo':
+        """
+        Create from dictionary.
+        
+        Args:
+            data: Dictionary representation
+            now: Timestamp to use when the data has no last_updated
+            
+        Returns:
+            ComponentStateInfo
+        """
         return cls(
             state=ComponentState(data["state"]),
             resource_id=data.get("resource_id"),
             error_message=data.get("error_message"),
-            last_updated=data.get("last_updated")
+            last_updated=data.get("last_updated") or now
         )
 
 
+class _ReadOnlyComponentStateInfo(ComponentStateInfo):
+    """ComponentStateInfo that cannot be modified, for sharing between factories."""
+    __slots__ = ()
+    
+    def __new__(cls, *args: Any, **kwargs: Any) -> ComponentStateInfo:
+        # Constructing from an instance (e.g. dataclasses.replace) yields an
+        # ordinary, mutable state; the shared default comes from _create
+        return ComponentStateInfo(*args, **kwargs)
+    
+    @classmethod
+    def _create(cls, state: ComponentState) -> '_ReadOnlyComponentStateInfo':
+        self = object.__new__(cls)
+        # Never updated, so no timestamp; set through object to bypass the guard
+        object.__setattr__(self, "state", state)
+        object.__setattr__(self, "resource_id", None)
+        object.__setattr__(self, "error_message", None)
+        object.__setattr__(self, "last_updated", None)
+        return self
+    
+    def __reduce__(self) -> str:
+        # Pickle by reference so unpickling returns the module singleton
+        return "_DEFAULT_UNDEPLOYED"
+    
+    def __copy__(self) -> '_ReadOnlyComponentStateInfo':
+        return self
+    
+    def __deepcopy__(self, memo: Dict[int, Any]) -> '_ReadOnlyComponentStateInfo':
+        return self
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Default component state is read-only; use ensure_component_state")
+    
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Default component state is read-only; use ensure_component_state")
+
+
+# Shared state reported for components that were never updated
+_DEFAULT_UNDEPLOYED = _ReadOnlyComponentStateInfo._create(ComponentState.UNDEPLOYED)
+
+
 class EnhancedIacFactory(IacFactory):
     """
     Extended IacFactory with state management and serialization.
     """
     
-    def __init__(self, name: str = "Infrastructure", design_id: Optional[str] = None):
+    def __init__(self, name: str = "Infrastructure", design_id: Optional[str] = None,
+                 created_at: Optional[str] = None, updated_at: Optional[str] = None):
         """
         Initialize enhanced factory.
         
         Args:
             name: Name of the infrastructure project
             design_id: Unique identifier for this design
+            created_at: Creation timestamp (defaults to now)
+            updated_at: Last update timestamp (defaults to now)
         """
         super().__init__(name)
+        self._components_by_name: Dict[str, Any] = {}
         self.design_id = design_id or str(uuid.uuid4())
         self.component_states: Dict[str, ComponentStateInfo] = {}
-        self.created_at = datetime.utcnow().isoformat()
-        self.updated_at = datetime.utcnow().isoformat()
+        if created_at is None or updated_at is None:
+            now = datetime.now(timezone.utc).isoformat()
+            created_at = created_at or now
+            updated_at = updated_at or now
+        self.created_at = created_at
+        self.updated_at = updated_at
+    
+    def add_component(self, component: Any) -> Any:
+        """
+        Add a component and index it by name.
+        
+        Args:
+            component: Component to add
+            
+        Returns:
+            Result of IacFactory.add_component
+        """
+        result = super().add_component(component)
+        self._components_by_name[component.name] = component
+        return result
+    
+    def _bulk_add_components(self, components: List[Any]) -> None:
+        """
+        Append already-validated components without per-component checks.
+        
+        Trusted fast path for deserialization; interactive code should use
+        add_component.
+        
+        Args:
+            components: Components with unique names
+            
+        Raises:
+            ValueError: If a name is duplicated
+        """
+        self._components.extend(components)
+        self._components_by_name.update((comp.name, comp) for comp in components)
+        if len(self._components_by_name) != len(self._components):
+            raise ValueError("Duplicate component names in design")
+    
+    def _bulk_add_connections(self, connections: List[Connection]) -> None:
+        """
+        Append connections whose endpoints are already in this factory.
+        
+        Trusted fast path for deserialization; interactive code should use
+        add_connection.
+        
+        Args:
+            connections: Connections between components of this factory
+        """
+        self._connections.extend(connections)
     
     def set_component_state(self, component_name: str, state: ComponentState, 
                            resource_id: Optional[str] = None,
@@ -90,30 +268,43 @@ class EnhancedIacFactory(IacFactory):
             resource_id: Cloud provider resource ID
             error_message: Error message if state is ERROR
         """
+        now = datetime.now(timezone.utc).isoformat()
         self.component_states[component_name] = ComponentStateInfo(
             state=state,
             resource_id=resource_id,
             error_message=error_message,
-            last_updated=datetime.utcnow().isoformat()
+            last_updated=now
         )
-        self.updated_at = datetime.utcnow().isoformat()
+        self.updated_at = now
     
     def get_component_state(self, component_name: str) -> ComponentStateInfo:
         """
-        Get the current state of a component.
+        Get the current state of a component without modifying the factory.
         
         Args:
             component_name: Name of the component
             
         Returns:
-            ComponentStateInfo
+            ComponentStateInfo, or a shared read-only UNDEPLOYED state if the
+            component has none
         """
-        if component_name not in self.component_states:
-            self.component_states[component_name] = ComponentStateInfo(
-                state=ComponentState.UNDEPLOYED,
-                last_updated=datetime.utcnow().isoformat()
-            )
-        return self.component_states[component_name]
+        return self.component_states.get(component_name, _DEFAULT_UNDEPLOYED)
+    
+    def ensure_component_state(self, component_name: str) -> ComponentStateInfo:
+        """
+        Get the state of a component, recording UNDEPLOYED if it has none.
+        
+        Args:
+            component_name: Name of the component
+            
+        Returns:
+            ComponentStateInfo stored on this factory
+        """
+        state = self.component_states.get(component_name)
+        if state is None:
+            state = ComponentStateInfo(state=ComponentState.UNDEPLOYED)
+            self.component_states[component_name] = state
+        return state
     
     def to_json(self) -> Dict[str, Any]:
         """
@@ -122,43 +313,27 @@ class EnhancedIacFactory(IacFactory):
         Returns:
             Dictionary representation
         """
-        # Serialize components
-        components_data = []
-        for comp in self._components:
-            comp_data = {
-                "name": comp.name,
-                "type": comp.__class__.__name__,
-                "domain_type": comp.domain_type,
-                "technology": comp.get_technology()
-            }
-            components_data.append(comp_data)
-        
-        # Serialize connections
-        connections_data = []
-        for conn in self._connections:
-            conn_data = {
-                "source": conn.source.name,
-                "destination": conn.destination.name,
-                "label": conn.label,
-                "technology": conn.technology
-            }
-            connections_data.append(conn_data)
+        # Serialize components and connections
+        components_data = [_component_record(comp) for comp in self._components]
+        connections_data = [_connection_record(conn) for conn in self._connections]
         
-        # Serialize component states
-        states_data = {
-            name: state.to_dict() 
-            for name, state in self.component_states.items()
-        }
-        
-        return {
+        data = {
             "design_id": self.design_id,
             "name": self._name,
             "components": components_data,
             "connections": connections_data,
-            "component_states": states_data,
             "created_at": self.created_at,
             "updated_at": self.updated_at
         }
+        
+        # Serialize component states, omitting the key when there are none
+        if self.component_states:
+            data["component_states"] = {
+                name: state.to_dict()
+                for name, state in self.component_states.items()
+            }
+        
+        return data
     
     @classmethod
     def from_json(cls, data: Dict[str, Any]) -> 'EnhancedIacFactory':
@@ -171,53 +346,52 @@ class EnhancedIacFactory(IacFactory):
         Returns:
             EnhancedIacFactory instance
         """
+        # One timestamp for every value missing from the data
+        now = datetime.now(timezone.utc).isoformat()
+        
         factory = cls(
             name=data["name"],
-            design_id=data.get("design_id")
+            design_id=data.get("design_id"),
+            created_at=data.get("created_at") or now,
+            updated_at=data.get("updated_at") or now
         )
         
-        # Restore timestamps
-        factory.created_at = data.get("created_at", datetime.utcnow().isoformat())
-        factory.updated_at = data.get("updated_at", datetime.utcnow().isoformat())
-        
-        # Component type mapping
-        component_classes = {
-            "Gateway": Gateway,
-            "Container": Container,
-            "Lambda": Lambda,
-            "Cache": Cache,
-            "Rdms": Rdms,
-            "Archive": Archive
-        }
-        
-        # Restore components
-        component_map = {}
-        for comp_data in data.get("components", []):
-            comp_class = component_classes.get(comp_data["type"])
-            if comp_class:
-                component = comp_class(
-                    name=comp_data["name"],
-                    domain_type=comp_data["domain_type"],
-                    technology=comp_data.get("technology", "")
-                )
-                factory.add_component(component)
-                component_map[comp_data["name"]] = component
+        # Restore components, skipping unknown types
+        factory._bulk_add_components([
+            comp_class(
+                name=comp_data["name"],
+                domain_type=comp_data["domain_type"],
+                technology=comp_data.get("technology", "")
+            )
+            for comp_data in data.get("components", [])
+            if (comp_class := _COMPONENT_CLASSES.get(comp_data["type"]))
+        ])
         
-        # Restore connections
+        # Restore connections, skipping dangling endpoints
+        components_by_name = factory._components_by_name
+        connections = []
         for conn_data in data.get("connections", []):
-            source = component_map.get(conn_data["source"])
-            destination = component_map.get(conn_data["destination"])
+            source = components_by_name.get(conn_data["source"])
+            destination = components_by_name.get(conn_data["destination"])
             if source and destination:
-                factory.add_connection(
+                connections.append(Connection(
                     source=source,
                     destination=destination,
                     label=conn_data.get("label", ""),
                     technology=conn_data.get("technology", "")
-                )
+                ))
+        factory._bulk_add_connections(connections)
         
         # Restore component states
-        for name, state_data in data.get("component_states", {}).items():
-            factory.component_states[name] = ComponentStateInfo.from_dict(state_data)
+        factory.component_states = {
+            name: ComponentStateInfo(
+                state=ComponentState(state_data["state"]),
+                resource_id=state_data.get("resource_id"),
+                error_message=state_data.get("error_message"),
+                last_updated=state_data.get("last_updated") or now
+            )
+            for name, state_data in data.get("component_states", {}).items()
+        }
         
         return factory
     
@@ -228,7 +402,7 @@ class EnhancedIacFactory(IacFactory):
         Returns:
             JSON string
         """
-        return json.dumps(self.to_json(), indent=2)
+        return _dumps(self.to_json())
     
     @classmethod
     def from_json_string(cls, json_str: str) -> 'EnhancedIacFactory':
@@ -241,5 +415,99 @@ class EnhancedIacFactory(IacFactory):
         Returns:
             EnhancedIacFactory instance
         """
-        data = json.loads(json_str)
+        data = _loads(json_str)
         return cls.from_json(data)
+    
+    def iter_jsonl(self) -> Iterator[bytes]:
+        """
+        Serialize to JSON Lines, one record at a time.
+        
+        The first line is a header record, followed by one line per
+        component, connection and component state. Each record names its
+        kind in a "record" field.
+        
+        Yields:
+            Newline-terminated JSON records
+        """
+        yield _dumps_line({
+            "record": "header",
+            "design_id": self.design_id,
+            "name": self._name,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        })
+        for comp in self._components:
+            yield _dumps_line({"record": "component", **_component_record(comp)})
+        for conn in self._connections:
+            yield _dumps_line({"record": "connection", **_connection_record(conn)})
+        for name, state in self.component_states.items():
+            yield _dumps_line({"record": "state", "name": name, **state.to_dict()})
+    
+    def to_jsonl(self, fp: IO[bytes]) -> None:
+        """
+        Write the design as JSON Lines.
+        
+        Args:
+            fp: Binary file object to write to
+        """
+        for line in self.iter_jsonl():
+            fp.write(line)
+    
+    @classmethod
+    def from_jsonl(cls, fp: IO) -> 'EnhancedIacFactory':
+        """
+        Deserialize from JSON Lines, building the factory record by record.
+        
+        Args:
+            fp: File object (text or binary) positioned at the header record
+            
+        Returns:
+            EnhancedIacFactory instance
+            
+        Raises:
+            ValueError: If the header is missing or a record kind is unknown
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        factory = None
+        
+        for line in fp:
+            if not line.strip():
+                continue
+            data = _loads(line)
+            kind = data.pop("record", None)
+            
+            if factory is None:
+                if kind != "header":
+                    raise ValueError("JSON Lines design must start with a header record")
+                factory = cls(
+                    name=data["name"],
+                    design_id=data.get("design_id"),
+                    created_at=data.get("created_at") or now,
+                    updated_at=data.get("updated_at") or now
+                )
+            elif kind == "component":
+                comp_class = _COMPONENT_CLASSES.get(data["type"])
+                if comp_class:
+                    factory.add_component(comp_class(
+                        name=data["name"],
+                        domain_type=data["domain_type"],
+                        technology=data.get("technology", "")
+                    ))
+            elif kind == "connection":
+                source = factory._components_by_name.get(data["source"])
+                destination = factory._components_by_name.get(data["destination"])
+                if source and destination:
+                    factory.add_connection(
+                        source=source,
+                        destination=destination,
+                        label=data.get("label", ""),
+                        technology=data.get("technology", "")
+                    )
+            elif kind == "state":
+                factory.component_states[data.pop("name")] = ComponentStateInfo.from_dict(data, now)
+            else:
+                raise ValueError(f"Unknown JSON Lines record: {kind}")
+        
+        if factory is None:
+            raise ValueError("JSON Lines design must start with a header record")
+        return factory
@@ -1,58 +1,119 @@
 """
 FastAPI backend for iac-factory GUI.
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-import uvicorn
-import sys
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, Response
+from typing import Optional
 import os
-from pathlib import Path
-
-# Add project root to path for iac-factory imports
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
 
 try:
     from gui.backend.api_routes import router as api_router
-    from gui.backend.code_generation import router as codegen_router
+    from gui.backend.code_generation import (
+        router as codegen_router, start_generation_pool, stop_generation_pool
+    )
+    from gui.backend.deps import design_manager
 except ImportError:
     # Fallback for direct execution
     from api_routes import router as api_router
-    from code_generation import router as codegen_router
+    from code_generation import (
+        router as codegen_router, start_generation_pool, stop_generation_pool
+    )
+    from deps import design_manager
 
-app = FastAPI(title="IaC Factory GUI", version="0.1.0")
+INDEX_PATH = "gui/frontend/index.html"
 
-# Configure CORS for local development
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify exact origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# Include API routers
-app.include_router(api_router)
-app.include_router(codegen_router)
+async def root(if_none_match: Optional[str] = Header(None)):
+    """Serve the main HTML page."""
+    try:
+        stat_result = os.stat(INDEX_PATH)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="index.html not found")
+    
+    # Starlette streams the file itself (sendfile where the server supports it)
+    response = FileResponse(INDEX_PATH, media_type="text/html", stat_result=stat_result)
+    etag = response.headers["etag"]
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return response
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="gui/frontend"), name="static")
 
+def start_workers():
+    """Start the code generation process pool."""
+    start_generation_pool()
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """Serve the main HTML page."""
-    with open("gui/frontend/index.html", "r") as f:
-        return f.read()
+
+def stop_workers():
+    """Stop the process pool and write any pending design saves."""
+    stop_generation_pool()
+    design_manager.flush()
 
 
-@app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
 
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application.
+    
+    Returns:
+        Configured FastAPI app with routers, static files and lifecycle hooks
+    """
+    app = FastAPI(title="IaC Factory GUI", version="0.1.0", default_response_class=ORJSONResponse)
+    
+    # Configure CORS for local development
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # In production, specify exact origins
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # Include API routers
+    app.include_router(api_router)
+    app.include_router(codegen_router)
+    
+    # Mount static files
+    app.mount("/static", StaticFiles(directory="gui/frontend"), name="static")
+    
+    app.add_api_route("/", root, methods=["GET"], response_class=HTMLResponse)
+    app.add_api_route("/health", health_check, methods=["GET"])
+    app.add_event_handler("startup", start_workers)
+    app.add_event_handler("shutdown", stop_workers)
+    
+    return app
+
+
+app = create_app()
+
+
+def main():
+    """Run the GUI server (console script entry point).
+    
+    Set IAC_GUI_DEV=1 to reload on source changes.
+    """
+    # Imported here so importing this module does not pull in the server
+    import uvicorn
+    
+    if os.environ.get("IAC_GUI_DEV") == "1":
+        # Reload needs an import string; run as a script this module is "main"
+        module = "main" if __name__ == "__main__" else __name__
+        backend_dir = os.path.dirname(os.path.abspath(__file__))
+        uvicorn.run(
+            f"{module}:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            reload_dirs=[backend_dir, os.path.join(os.path.dirname(backend_dir), "frontend")]
+        )
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
+
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+    main()
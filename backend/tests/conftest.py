@@ -0,0 +1,45 @@
+"""
+Shared fixtures for the backend tests.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from gui.backend import api_routes
+from gui.backend.design_manager import DesignManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """DesignManager backed by a temporary storage directory."""
+    manager = DesignManager(storage_dir=str(tmp_path / "designs"))
+    yield manager
+    manager.flush()
+
+
+@pytest.fixture
+def app(manager, monkeypatch):
+    """App serving the design routes from the temporary manager."""
+    monkeypatch.setattr(api_routes, "design_manager", manager)
+    app = FastAPI()
+    app.include_router(api_routes.router)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """Client for the app's routes."""
+    return TestClient(app)
+
+
+@pytest.fixture
+def design_id(client):
+    """A design with two connected components."""
+    design_id = client.post("/api/designs", json={"name": "Shop"}).json()["design_id"]
+    response = client.post(f"/api/designs/{design_id}/batch", json=[
+        {"op": "add_component", "payload": {"name": "Web App", "type": "Container", "domain_type": "Web"}},
+        {"op": "add_component", "payload": {"name": "User DB", "type": "Rdms", "domain_type": "Data"}},
+        {"op": "add_connection", "payload": {"source": "Web App", "destination": "User DB"}},
+    ])
+    assert response.status_code == 200
+    return design_id
@@ -0,0 +1,144 @@
+"""
+Tests for the design API routes.
+"""
+import orjson
+
+
+def test_put_design_with_connections(client, design_id):
+    """Saving a whole design returns it without the in-memory indexes."""
+    design = client.get(f"/api/designs/{design_id}").json()
+    design["components"].append({"name": "Cache", "type": "Cache", "domain_type": "Data"})
+    design["connections"].append({"source": "Web App", "destination": "Cache"})
+    
+    response = client.put(f"/api/designs/{design_id}", json=design)
+    
+    assert response.status_code == 200
+    saved = response.json()
+    assert not any(key.startswith("_") for key in saved)
+    assert saved["connections"] == design["connections"]
+    assert client.get(f"/api/designs/{design_id}").json()["connections"] == design["connections"]
+
+
+def test_put_design_reports_validation_errors(client, design_id):
+    """A design with a dangling connection is rejected and not saved."""
+    design = client.get(f"/api/designs/{design_id}").json()
+    design["connections"].append({"source": "Web App", "destination": "Queue"})
+    
+    response = client.put(f"/api/designs/{design_id}", json=design)
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == {
+        "errors": ["Connection 1 references non-existent destination: Queue"]
+    }
+    assert len(client.get(f"/api/designs/{design_id}").json()["connections"]) == 1
+
+
+def test_put_design_rejects_duplicate_names(client, design_id):
+    """Two components with one name would break rename and delete by name."""
+    design = client.get(f"/api/designs/{design_id}").json()
+    design["components"].append(dict(design["components"][0]))
+    
+    response = client.put(f"/api/designs/{design_id}", json=design)
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == {"errors": ["Duplicate component name: Web App"]}
+
+
+def test_batch_applies_mixed_operations(client, design_id):
+    """All operations in a batch are applied in order and saved once."""
+    response = client.post(f"/api/designs/{design_id}/batch", json=[
+        {"op": "add_component", "payload": {"name": "Cache", "type": "Cache", "domain_type": "Data"}},
+        {"op": "add_connection", "payload": {"source": "Web App", "destination": "Cache"}},
+        {"op": "update_connection", "target": 1, "payload": {"label": "Reads"}},
+        {"op": "update_component", "target": "User DB", "payload": {"technology": "PostgreSQL"}},
+    ])
+    
+    assert response.status_code == 200
+    design = client.get(f"/api/designs/{design_id}").json()
+    assert [c["name"] for c in design["components"]] == ["Web App", "User DB", "Cache"]
+    assert design["components"][1]["technology"] == "PostgreSQL"
+    assert design["connections"][1] == {
+        "source": "Web App", "destination": "Cache", "label": "Reads", "technology": ""
+    }
+    assert not any(key.startswith("_") for key in design)
+
+
+def test_batch_is_all_or_nothing(client, design_id):
+    """A failing operation reports its index and leaves the design unchanged."""
+    before = client.get(f"/api/designs/{design_id}").json()
+    
+    response = client.post(f"/api/designs/{design_id}/batch", json=[
+        {"op": "add_component", "payload": {"name": "Cache", "type": "Cache", "domain_type": "Data"}},
+        {"op": "add_connection", "payload": {"source": "Cache", "destination": "Queue"}},
+    ])
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == {"op": 1, "error": "Destination component 'Queue' not found"}
+    assert client.get(f"/api/designs/{design_id}").json() == before
+
+
+def test_batch_rejects_invalid_payload(client, design_id):
+    """A payload that fails model validation is a 422 naming the operation."""
+    response = client.post(f"/api/designs/{design_id}/batch", json=[
+        {"op": "update_component", "target": "Web App", "payload": {"technology": "Docker"}},
+        {"op": "add_component", "payload": {"name": "Cache", "type": "Cache", "domain_type": "Backend"}},
+    ])
+    
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert detail["op"] == 1
+    assert detail["error"][0]["loc"] == ["domain_type"]
+
+
+def test_batch_rename_and_delete_keep_connections_consistent(client, design_id):
+    """Renames follow into connections and deletes drop the connections they orphan."""
+    response = client.post(f"/api/designs/{design_id}/batch", json=[
+        {"op": "add_component", "payload": {"name": "Gateway", "type": "Gateway", "domain_type": "Public"}},
+        {"op": "add_connection", "payload": {"source": "Gateway", "destination": "Web App"}},
+        {"op": "update_component", "target": "Web App", "payload": {"name": "Frontend"}},
+        {"op": "delete_component", "target": "User DB"},
+        {"op": "update_connection", "target": 0, "payload": {"label": "Routes"}},
+        {"op": "add_connection", "payload": {"source": "Frontend", "destination": "Gateway"}},
+    ])
+    
+    assert response.status_code == 200
+    design = response.json()
+    assert [c["name"] for c in design["components"]] == ["Frontend", "Gateway"]
+    assert design["connections"] == [
+        {"source": "Gateway", "destination": "Frontend", "label": "Routes", "technology": ""},
+        {"source": "Frontend", "destination": "Gateway", "label": "", "technology": ""},
+    ]
+    
+    # The renamed component is found under its new name only
+    response = client.post(f"/api/designs/{design_id}/batch", json=[
+        {"op": "delete_component", "target": "Web App"},
+    ])
+    assert response.status_code == 404
+    assert response.json()["detail"] == {"op": 0, "error": "Component 'Web App' not found"}
+
+
+def test_export_jsonl_streams_records(client, design_id):
+    """The export starts with a header followed by one line per record."""
+    response = client.get(f"/api/designs/{design_id}/export/jsonl")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [r["record"] for r in records] == ["header", "component", "component", "connection"]
+    assert records[0]["design_id"] == design_id
+    assert records[3] == {
+        "record": "connection", "source": "Web App", "destination": "User DB",
+        "label": "", "technology": ""
+    }
+
+
+def test_export_jsonl_rejects_unrestorable_design(client, design_id):
+    """A design the factory cannot restore is a 400, not a server error."""
+    design = client.get(f"/api/designs/{design_id}").json()
+    design["component_states"] = {"Web App": {"state": "exploded"}}
+    assert client.put(f"/api/designs/{design_id}", json=design).status_code == 200
+    
+    response = client.get(f"/api/designs/{design_id}/export/jsonl")
+    
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Design cannot be exported")
@@ -0,0 +1,112 @@
+"""
+Tests for the code generation endpoints.
+"""
+import pytest
+
+from gui.backend import code_generation
+
+
+@pytest.fixture
+def app(app, manager, monkeypatch):
+    """Add the generation routes, reading from the same manager."""
+    monkeypatch.setattr(code_generation, "design_manager", manager)
+    app.include_router(code_generation.router)
+    return app
+
+
+@pytest.fixture
+def generator_calls(monkeypatch):
+    """Record each generator run."""
+    calls = []
+    run_generator = code_generation._run_generator
+    
+    def counting_run_generator(design_data, method_name):
+        calls.append(method_name)
+        return run_generator(design_data, method_name)
+    
+    monkeypatch.setattr(code_generation, "_run_generator", counting_run_generator)
+    return calls
+
+
+def test_generate_returns_json_with_etag(client, design_id):
+    """The default format is JSON carrying the code and its format."""
+    response = client.post(f"/api/designs/{design_id}/generate/pulumi")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["format"] == "python"
+    assert response.json()["code"]
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+
+
+@pytest.mark.parametrize("target, media_type", [
+    ("mermaid", "text/plain"),
+    ("pulumi", "text/x-python"),
+    ("cdk", "text/x-python"),
+])
+def test_generate_raw_format(client, design_id, target, media_type):
+    """?format=raw returns the bare code with the target's media type."""
+    json_response = client.post(f"/api/designs/{design_id}/generate/{target}")
+    raw_response = client.post(f"/api/designs/{design_id}/generate/{target}?format=raw")
+    
+    assert raw_response.status_code == 200
+    assert raw_response.headers["content-type"].split(";")[0] == media_type
+    assert raw_response.text == json_response.json()["code"]
+    assert raw_response.headers["etag"] != json_response.headers["etag"]
+
+
+def test_generate_not_modified(client, design_id):
+    """A matching If-None-Match gets a 304 until the design changes."""
+    etag = client.post(f"/api/designs/{design_id}/generate/mermaid").headers["etag"]
+    
+    response = client.post(f"/api/designs/{design_id}/generate/mermaid", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    
+    client.post(f"/api/designs/{design_id}/batch", json=[
+        {"op": "update_component", "target": "Web App", "payload": {"name": "Frontend"}},
+    ])
+    response = client.post(f"/api/designs/{design_id}/generate/mermaid", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_generated_code_is_cached_until_design_changes(client, design_id, generator_calls):
+    """Unchanged designs reuse the cached code in both formats."""
+    first = client.post(f"/api/designs/{design_id}/generate/cdk")
+    client.post(f"/api/designs/{design_id}/generate/cdk")
+    client.post(f"/api/designs/{design_id}/generate/cdk?format=raw")
+    assert generator_calls == ["generate_cdk_code"]
+    
+    # Editing the design invalidates the cached code
+    client.post(f"/api/designs/{design_id}/batch", json=[
+        {"op": "update_connection", "target": 0, "payload": {"label": "Queries"}},
+    ])
+    second = client.post(f"/api/designs/{design_id}/generate/cdk")
+    assert generator_calls == ["generate_cdk_code", "generate_cdk_code"]
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_generate_recovers_from_dead_worker(client, design_id):
+    """A pool whose worker process died is replaced instead of failing forever."""
+    code_generation.start_generation_pool(max_workers=1)
+    try:
+        assert client.post(f"/api/designs/{design_id}/generate/pulumi").status_code == 200
+        broken = code_generation._executor
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join()
+        
+        # A different target misses the cache, so it must reach the pool
+        response = client.post(f"/api/designs/{design_id}/generate/cdk")
+        assert response.status_code == 200
+        assert code_generation._executor is not broken
+    finally:
+        code_generation.stop_generation_pool()
+
+
+def test_generate_unknown_design(client):
+    """Generating for a missing design is a 404."""
+    response = client.post("/api/designs/missing/generate/mermaid")
+    assert response.status_code == 404
@@ -0,0 +1,282 @@
+"""
+Tests for DesignManager persistence and caching.
+"""
+import pytest
+import os
+
+import orjson
+
+from gui.backend.design_manager import DesignManager, COMPONENT_INDEX, CONNECTION_INDEX, INDEX_FILE
+
+
+def test_load_returns_saved_design(manager):
+    """A saved design can be loaded back unchanged."""
+    design = manager.create_design("Test Design")
+    design["components"].append({
+        "name": "API Gateway",
+        "type": "Gateway",
+        "domain_type": "Public",
+        "technology": "AWS API Gateway"
+    })
+    manager.save_design(design)
+
+    loaded = manager.load_design(design["design_id"])
+    assert loaded["name"] == "Test Design"
+    assert loaded["components"] == design["components"]
+
+
+def test_new_design_has_matching_timestamps(manager):
+    """A new design is created and saved at the same instant."""
+    design = manager.create_design("Fresh")
+    
+    assert design["created_at"] == design["updated_at"]
+    assert manager.load_design(design["design_id"])["updated_at"] == design["created_at"]
+
+
+def test_cached_design_is_isolated_from_callers(manager):
+    """Mutating a loaded design must not leak into later loads."""
+    design = manager.create_design("Isolation")
+
+    first = manager.load_design(design["design_id"])
+    first["components"].append({"name": "Stray", "type": "Lambda", "domain_type": "Application"})
+
+    second = manager.load_design(design["design_id"])
+    assert second["components"] == []
+
+
+def test_external_change_invalidates_cache(manager):
+    """Editing the file on disk is picked up on the next load."""
+    design = manager.create_design("Original")
+    manager.flush()
+    manager.load_design(design["design_id"])
+
+    path = manager._get_design_path(design["design_id"])
+    stat = path.stat()
+    path.write_text(path.read_text().replace("Original", "Edited"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert manager.load_design(design["design_id"])["name"] == "Edited"
+
+
+def test_delete_design_invalidates_cache(manager):
+    """A deleted design cannot be loaded from the cache."""
+    design = manager.create_design("Doomed")
+    manager.load_design(design["design_id"])
+
+    manager.delete_design(design["design_id"])
+
+    with pytest.raises(FileNotFoundError):
+        manager.load_design(design["design_id"])
+
+
+def test_loaded_design_is_indexed(manager):
+    """Loaded designs carry name indexes that are never written to disk."""
+    design = manager.create_design("Indexed")
+    design["components"] = [
+        {"name": "Web App", "type": "Container", "domain_type": "Web"},
+        {"name": "User DB", "type": "Rdms", "domain_type": "Data"},
+    ]
+    design["connections"] = [{"source": "Web App", "destination": "User DB"}]
+    manager.save_design(design)
+    manager.flush()
+
+    loaded = manager.load_design(design["design_id"])
+    assert loaded[COMPONENT_INDEX] == {"Web App": 0, "User DB": 1}
+    assert loaded[CONNECTION_INDEX] == {"Web App": {0}, "User DB": {0}}
+
+    on_disk = manager._get_design_path(design["design_id"]).read_text()
+    assert COMPONENT_INDEX not in on_disk
+    assert CONNECTION_INDEX not in on_disk
+
+
+def test_saves_are_coalesced_until_flush(manager):
+    """Repeated saves are served from memory and written once on flush."""
+    design = manager.create_design("Draft")
+    path = manager._get_design_path(design["design_id"])
+
+    for i in range(5):
+        design["name"] = f"Draft {i}"
+        manager.save_design(design)
+
+    assert manager.load_design(design["design_id"])["name"] == "Draft 4"
+
+    manager.flush()
+    assert path.exists()
+    assert '"Draft 4"' in path.read_text()
+
+
+def test_delete_unflushed_design(manager):
+    """A design deleted before its first flush is never written."""
+    design = manager.create_design("Ephemeral")
+
+    manager.delete_design(design["design_id"])
+    manager.flush()
+
+    assert not manager._get_design_path(design["design_id"]).exists()
+    with pytest.raises(FileNotFoundError):
+        manager.load_design(design["design_id"])
+
+
+def test_flush_leaves_no_temporary_files(manager):
+    """Atomic writes clean up after themselves."""
+    design = manager.create_design("Atomic")
+    manager.flush()
+
+    files = sorted(p.name for p in manager.storage_dir.iterdir())
+    assert files == sorted([f"{design['design_id']}.json", INDEX_FILE])
+
+
+def test_failed_write_stays_queued(manager, monkeypatch):
+    """A failing design write does not stop the others and is retried."""
+    broken = manager.create_design("Broken")
+    healthy = manager.create_design("Healthy")
+    write_design = manager._write_design
+    
+    def failing_write(design_id, design_data):
+        if design_id == broken["design_id"]:
+            raise OSError("disk full")
+        return write_design(design_id, design_data)
+    
+    monkeypatch.setattr(manager, "_write_design", failing_write)
+    manager.flush()
+    
+    assert manager._get_design_path(healthy["design_id"]).exists()
+    assert (manager.storage_dir / INDEX_FILE).exists()
+    assert not manager._get_design_path(broken["design_id"]).exists()
+    assert manager.load_design(broken["design_id"])["name"] == "Broken"
+    assert manager._flush_timer is not None
+    
+    monkeypatch.setattr(manager, "_write_design", write_design)
+    manager.flush()
+    assert manager._get_design_path(broken["design_id"]).exists()
+
+
+def test_list_designs_tracks_saves_and_deletes(manager):
+    """Listings reflect pending saves and deletes without a flush."""
+    kept = manager.create_design("Kept")
+    dropped = manager.create_design("Dropped")
+    kept["components"].append({"name": "Cache", "type": "Cache", "domain_type": "Data"})
+    manager.save_design(kept)
+    manager.delete_design(dropped["design_id"])
+
+    designs = manager.list_designs()
+    assert [d["design_id"] for d in designs] == [kept["design_id"]]
+    assert designs[0]["component_count"] == 1
+
+
+def test_list_designs_rebuilds_missing_index(manager):
+    """Without the sidecar index, summaries are rebuilt from design files."""
+    manager.create_design("Rebuilt")
+    manager.flush()
+    (manager.storage_dir / INDEX_FILE).unlink()
+
+    fresh = DesignManager(storage_dir=str(manager.storage_dir))
+    assert [d["name"] for d in fresh.list_designs()] == ["Rebuilt"]
+
+    fresh.flush()
+    assert (manager.storage_dir / INDEX_FILE).exists()
+
+
+def test_list_designs_reconciles_stale_index(manager):
+    """Design files the sidecar missed are listed; deleted files are dropped."""
+    kept = manager.create_design("Kept")
+    removed = manager.create_design("Removed")
+    manager.flush()
+    
+    # A design written without its index update, as after a crash mid-flush
+    orphan = {**kept, "design_id": "orphan", "name": "Orphan"}
+    manager._get_design_path("orphan").write_bytes(orjson.dumps(orphan))
+    manager._get_design_path(removed["design_id"]).unlink()
+    
+    fresh = DesignManager(storage_dir=str(manager.storage_dir))
+    assert sorted(d["name"] for d in fresh.list_designs()) == ["Kept", "Orphan"]
+    
+    fresh.flush()
+    index = orjson.loads((manager.storage_dir / INDEX_FILE).read_bytes())
+    assert sorted(index) == sorted([kept["design_id"], "orphan"])
+
+
+def test_index_file_does_not_collide_with_design_ids(manager):
+    """Any design ID, including the old sidecar name, round-trips through storage."""
+    design = manager.create_design("Underscore")
+    design["design_id"] = "_index"
+    manager.save_design(design)
+    manager.flush()
+
+    fresh = DesignManager(storage_dir=str(manager.storage_dir))
+    assert fresh.load_design("_index")["name"] == "Underscore"
+    assert "_index" in [d["design_id"] for d in fresh.list_designs()]
+
+
+def test_validate_design_reports_errors(manager):
+    """Schema and reference errors are reported as readable messages."""
+    errors = manager.validate_design({
+        "design_id": "d1",
+        "name": "Broken",
+        "components": [
+            {"name": "Web App", "type": "Container", "domain_type": "Backend"},
+            {"type": "Rdms", "domain_type": "Data"},
+        ],
+        "connections": [{"source": "Web App", "destination": "User DB"}],
+    })
+
+    assert errors == [
+        "Component 0 has invalid domain_type: Backend",
+        "Component 1 missing 'name' field",
+        "Connection 0 references non-existent destination: User DB",
+    ]
+
+
+def test_validate_design_accepts_extra_fields(manager):
+    """Layout fields stored by the frontend are allowed."""
+    errors = manager.validate_design({
+        "design_id": "d1",
+        "name": "Laid Out",
+        "components": [{"name": "Web App", "type": "Container", "domain_type": "Web", "x": 10, "y": 20}],
+        "connections": [],
+    })
+
+    assert errors == []
+
+
+def test_validate_design_rejects_duplicate_names(manager):
+    """Component names must be unique for the name indexes to hold."""
+    errors = manager.validate_design({
+        "design_id": "d1",
+        "name": "Twins",
+        "components": [
+            {"name": "Gateway 1", "type": "Gateway", "domain_type": "Public"},
+            {"name": "User DB", "type": "Rdms", "domain_type": "Data"},
+            {"name": "Gateway 1", "type": "Gateway", "domain_type": "Public"},
+        ],
+        "connections": [{"source": "Gateway 1", "destination": "User DB"}],
+    })
+    
+    assert errors == ["Duplicate component name: Gateway 1"]
+
+
+def test_load_design_rejects_duplicate_names_on_disk(manager):
+    """A stored design with duplicate names is reported instead of indexed."""
+    design = manager.create_design("Twins")
+    manager.flush()
+    path = manager._get_design_path(design["design_id"])
+    component = {"name": "Gateway 1", "type": "Gateway", "domain_type": "Public"}
+    path.write_bytes(orjson.dumps({**design, "components": [component, component]}))
+    
+    with pytest.raises(ValueError, match="duplicate component name: Gateway 1"):
+        manager.load_design(design["design_id"])
+
+
+def test_validate_design_reports_dangling_connection(manager):
+    """A well-formed design with an unknown connection endpoint is rejected."""
+    errors = manager.validate_design({
+        "design_id": "d1",
+        "name": "Dangling",
+        "components": [{"name": "Web App", "type": "Container", "domain_type": "Web"}],
+        "connections": [
+            {"source": "Web App", "destination": "Web App"},
+            {"source": "Gateway", "destination": "Web App"},
+        ],
+    })
+
+    assert errors == ["Connection 1 references non-existent source: Gateway"]
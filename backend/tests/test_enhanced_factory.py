@@ -6,39 +6,53 @@ Feature: interactive-gui-lifecycle, Property 4: Design persistence round-trip
 import pytest
 from hypothesis import given, strategies as st
 from hypothesis.strategies import composite
-import sys
-import os
+import copy
+import dataclasses
+import io
+import pickle
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
-
-from gui.backend.enhanced_factory import EnhancedIacFactory, ComponentState
+from gui.backend.enhanced_factory import EnhancedIacFactory, ComponentState, ComponentStateInfo
 from iac_factory.components import Gateway, Container, Lambda, Cache, Rdms, Archive
 
 
+# Leaf strategies, built once and shared by every draw
+_COMP_TYPES = st.sampled_from([Gateway, Container, Lambda, Cache, Rdms, Archive])
+_COMP_NAMES = st.text(min_size=1, max_size=20, alphabet=st.characters(whitelist_categories=('Lu', 'Ll', 'Nd')))
+_DOMAINS = st.sampled_from(["Public", "Web", "Application", "Data"])
+_TECHNOLOGIES = st.text(min_size=1, max_size=15, alphabet=st.characters(whitelist_categories=('Lu', 'Ll')))
+_FACTORY_NAMES = st.text(min_size=1, max_size=30, alphabet=st.characters(whitelist_categories=('Lu', 'Ll', 'Nd', 'Zs')))
+_COMPONENT_COUNTS = st.integers(min_value=1, max_value=5)
+_LABELS = st.text(max_size=20)
+_CONNECTION_TECHNOLOGIES = st.text(max_size=10)
+
+
 # Strategy for generating component types
 @composite
 def component_strategy(draw):
     """Generate random components."""
-    comp_type = draw(st.sampled_from([Gateway, Container, Lambda, Cache, Rdms, Archive]))
-    name = draw(st.text(min_size=1, max_size=20, alphabet=st.characters(whitelist_categories=('Lu', 'Ll', 'Nd'))))
-    domain = draw(st.sampled_from(["Public", "Web", "Application", "Data"]))
-    tech = draw(st.text(min_size=1, max_size=15, alphabet=st.characters(whitelist_categories=('Lu', 'Ll'))))
+    comp_type = draw(_COMP_TYPES)
+    name = draw(_COMP_NAMES)
+    domain = draw(_DOMAINS)
+    tech = draw(_TECHNOLOGIES)
     
     return comp_type(name=f"comp_{name}", domain_type=domain, technology=tech)
 
 
+_COMPONENTS = component_strategy()
+
+
 @composite
 def factory_strategy(draw):
     """Generate random factories with components and connections."""
-    name = draw(st.text(min_size=1, max_size=30, alphabet=st.characters(whitelist_categories=('Lu', 'Ll', 'Nd', 'Zs'))))
+    name = draw(_FACTORY_NAMES)
     factory = EnhancedIacFactory(name=name or "Test")
     
     # Add 1-5 components
-    num_components = draw(st.integers(min_value=1, max_value=5))
+    num_components = draw(_COMPONENT_COUNTS)
     components = []
     for _ in range(num_components):
         try:
-            comp = draw(component_strategy())
+            comp = draw(_COMPONENTS)
             factory.add_component(comp)
             components.append(comp)
         except ValueError:
@@ -51,8 +65,8 @@ def factory_strategy(draw):
         for _ in range(num_connections):
             source = draw(st.sampled_from(components))
             destination = draw(st.sampled_from([c for c in components if c != source]))
-            label = draw(st.text(max_size=20))
-            tech = draw(st.text(max_size=10))
+            label = draw(_LABELS)
+            tech = draw(_CONNECTION_TECHNOLOGIES)
             try:
                 factory.add_connection(source, destination, label, tech)
             except ValueError:
@@ -109,6 +123,19 @@ def test_design_persistence_round_trip(factory):
         assert orig_conn.technology == rest_conn.technology
 
 
+@given(factory_strategy())
+def test_jsonl_round_trip(factory):
+    """Streaming through JSON Lines reconstructs the same design."""
+    factory.set_component_state(factory.components[0].name, ComponentState.DEPLOYED, "resource-1")
+    
+    buffer = io.BytesIO()
+    factory.to_jsonl(buffer)
+    buffer.seek(0)
+    restored = EnhancedIacFactory.from_jsonl(buffer)
+    
+    assert restored.to_json() == factory.to_json()
+
+
 def test_simple_round_trip():
     """Simple test case for round-trip serialization."""
     factory = EnhancedIacFactory("Test Infrastructure")
@@ -141,6 +168,47 @@ def test_simple_round_trip():
     assert restored.get_component_state("API Gateway").resource_id == "resource-123"
 
 
+def test_get_component_state_does_not_record_default():
+    """Reading an unknown state leaves the factory unchanged; ensuring it records it."""
+    factory = EnhancedIacFactory("States")
+    
+    default = factory.get_component_state("Web App")
+    assert default.state == ComponentState.UNDEPLOYED
+    assert default.last_updated is None
+    assert factory.component_states == {}
+    
+    # The default is shared between factories, so it cannot be modified
+    with pytest.raises(AttributeError):
+        default.resource_id = "resource-1"
+    assert EnhancedIacFactory("Other").get_component_state("Web App").resource_id is None
+    
+    # Copies and pickles resolve to the same shared default
+    assert copy.copy(default) is default
+    assert copy.deepcopy({"Web App": default})["Web App"] is default
+    assert pickle.loads(pickle.dumps(default)) is default
+    
+    # replace builds an ordinary state that can be updated
+    deployed = dataclasses.replace(default, state=ComponentState.DEPLOYED)
+    assert type(deployed) is ComponentStateInfo
+    assert deployed.state == ComponentState.DEPLOYED
+    deployed.resource_id = "resource-1"
+    assert default.state == ComponentState.UNDEPLOYED
+    
+    state = factory.ensure_component_state("Web App")
+    assert state.state == ComponentState.UNDEPLOYED
+    assert state.last_updated is not None
+    assert factory.component_states == {"Web App": state}
+
+
+def test_to_json_omits_empty_component_states():
+    """Designs without states serialize without the component_states key."""
+    factory = EnhancedIacFactory("Stateless")
+    json_data = factory.to_json()
+    
+    assert "component_states" not in json_data
+    assert EnhancedIacFactory.from_json(json_data).component_states == {}
+
+
 if __name__ == "__main__":
     # Run simple test
     test_simple_round_trip()
@@ -5,9 +5,6 @@ Feature: interactive-gui-lifecycle, Property 4: Design persistence round-trip
 Validates: Requirements 1.5, 7.1, 7.3
 """
 import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
 from gui.backend.enhanced_factory import EnhancedIacFactory, ComponentState
 from iac_factory.components import Gateway, Container, Lambda, Cache, Rdms, Archive
@@ -0,0 +1,12 @@
+"""
+Pytest configuration: make the project root importable for the test suite.
+
+Tests import the GUI as ``gui.backend`` and the core package as
+``iac_factory``, both of which live in the directory above this checkout.
+"""
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
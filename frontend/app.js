@@ -461,8 +461,14 @@ function setupPalette() {
 }
 
 function addComponent(type, x, y) {
+    // Loaded designs may already use the next number; names must be unique
+    let name;
+    do {
+        name = `${type} ${state.nextComponentId++}`;
+    } while (state.components.some(c => c.name === name));
+    
     const component = {
-        name: `${type} ${state.nextComponentId++}`,
+        name: name,
         type: type,
         domain_type: getDefaultDomain(type),
         technology: getDefaultTechnology(type),
@@ -7,8 +7,11 @@ import sys
 import os
 from pathlib import Path
 
-# Add current directory to Python path
+# Dev bootstrap: make this checkout importable as both backend.* and
+# gui.backend.*, and pick up an iac_factory checkout next to it. Installed
+# packages do not need this.
 current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir.parent))
 sys.path.insert(0, str(current_dir))
 
 
@@ -22,21 +25,31 @@ def main():
         print("\n📦 Please install the GUI package:")
         print("   pip install -e .")
         print("\n   Or install dependencies:")
-        print("   pip install fastapi uvicorn[standard] pydantic python-multipart")
+        print("   pip install fastapi uvicorn[standard] pydantic orjson python-multipart")
         sys.exit(1)
     
     print("🚀 Starting IaC Factory GUI...")
     print("📍 Server will be available at: http://localhost:8000")
     print("⏹️  Press Ctrl+C to stop\n")
     
+    # Auto-reload only in development: the watcher process costs CPU and memory.
+    # The server stays single-process because designs are cached and
+    # write-behind queued in memory per process.
+    dev = os.environ.get("IAC_GUI_DEV") == "1"
+    
     try:
-        uvicorn.run(
-            app,
-            host="0.0.0.0",
-            port=8000,
-            reload=True,
-            reload_dirs=[str(current_dir / "backend"), str(current_dir / "frontend")]
-        )
+        if dev:
+            print("🔁 Development mode: reloading on file changes\n")
+            # Reload needs an import string rather than the app object
+            uvicorn.run(
+                "backend.main:app",
+                host="0.0.0.0",
+                port=8000,
+                reload=True,
+                reload_dirs=[str(current_dir / "backend"), str(current_dir / "frontend")]
+            )
+        else:
+            uvicorn.run(app, host="0.0.0.0", port=8000)
     except KeyboardInterrupt:
         print("\n\n👋 Shutting down gracefully...")
     except Exception as e:
@@ -14,15 +14,20 @@ setup(
         "fastapi>=0.104.1",
         "uvicorn[standard]>=0.24.0",
         "pydantic>=2.5.0",
+        "typing-extensions>=4.6.1",
+        "orjson>=3.9.10",
         "python-multipart>=0.0.6",
     ],
     extras_require={
+        "fast-pure-c": [
+            "ujson>=5.0.0",
+        ],
         "dev": [
             "pytest>=7.4.3",
             "hypothesis>=6.92.1",
         ]
     },
-    python_requires=">=3.8",
+    python_requires=">=3.10",
     entry_points={
         "console_scripts": [
             "iac-gui=backend.main:main",